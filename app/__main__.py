@@ -1,5 +1,8 @@
+import signal
+
 import sentry_sdk
 
+from app.components.entity_mentions import save_caches
 from app.core import bot, config
 
 if config.SENTRY_DSN is not None:
@@ -9,4 +12,9 @@ if config.SENTRY_DSN is not None:
         profiles_sample_rate=1.0,
     )
 
-bot.run(config.BOT_TOKEN)
+# Shut down gracefully on SIGTERM (e.g. `docker stop`) like on Ctrl+C
+signal.signal(signal.SIGTERM, signal.default_int_handler)
+try:
+    bot.run(config.BOT_TOKEN)
+finally:
+    save_caches()
@@ -1,45 +1,119 @@
+import asyncio
 import datetime as dt
+import time
 from collections.abc import Sequence
 from typing import cast
 
+import aiohttp
 import discord
 from discord.ext import tasks
 
 from app.setup import bot, config
 
+# Posts tagged as solved, moved, duplicate or stale
+RESOLVED_TAG_IDS = frozenset(config.HELP_CHANNEL_TAG_IDS.values())
+
+MAX_CONCURRENT_ARCHIVES = 5
+ARCHIVE_ATTEMPTS = 3
+
+# IDs of open, resolved help posts, kept up to date by thread events
+close_candidates: set[int] = set()
+
+
+def _track(post: discord.Thread) -> None:
+    if (
+        post.parent_id == config.HELP_CHANNEL_ID
+        and not post.archived
+        and any(tag.id in RESOLVED_TAG_IDS for tag in post.applied_tags)
+    ):
+        close_candidates.add(post.id)
+    else:
+        close_candidates.discard(post.id)
+
+
+@bot.event
+async def on_thread_create(thread: discord.Thread) -> None:
+    _track(thread)
+
+
+@bot.event
+async def on_thread_update(_: discord.Thread, after: discord.Thread) -> None:
+    _track(after)
+
+
+@bot.event
+async def on_thread_delete(thread: discord.Thread) -> None:
+    close_candidates.discard(thread.id)
+
+
+async def _archive(post: discord.Thread, semaphore: asyncio.Semaphore) -> bool:
+    # discord.py already waits out per-route rate limits and retries 5xx
+    # responses, this only bounds how many requests queue up at once and retries
+    # timeouts and connection failures, which discord.py mostly passes through
+    async with semaphore:
+        for attempt in range(ARCHIVE_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(2**attempt)
+            try:
+                await post.edit(archived=True)
+            except (TimeoutError, aiohttp.ClientError):
+                continue
+            except discord.HTTPException:
+                # Either not worth retrying (e.g. missing permissions), or already
+                # retried by discord.py
+                return False
+            return True
+    return False
+
 
 @tasks.loop(hours=1)
 async def autoclose_solved_posts() -> None:
-    closed_posts: list[discord.Thread] = []
+    due_posts: list[discord.Thread] = []
     failures: list[discord.Thread] = []
 
     help_channel = cast(discord.ForumChannel, bot.get_channel(config.HELP_CHANNEL_ID))
-    open_posts = len(help_channel.threads)
-    for post in help_channel.threads:
-        if post.archived or not any(
-            _has_tag(post, tag)
-            for tag in ("solved", "moved to github", "duplicate", "stale")
-        ):
+    resolved_posts = len(close_candidates)
+    for post_id in list(close_candidates):
+        if (post := help_channel.get_thread(post_id)) is None or post.archived:
+            close_candidates.discard(post_id)
             continue
         if post.last_message_id is None:
             failures.append(post)
             continue
         one_day_ago = dt.datetime.now(tz=dt.UTC) - dt.timedelta(hours=24)
         if discord.utils.snowflake_time(post.last_message_id) < one_day_ago:
-            await post.edit(archived=True)
-            closed_posts.append(post)
+            due_posts.append(post)
+
+    started_at = time.perf_counter()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_ARCHIVES)
+    archived = await asyncio.gather(*(_archive(post, semaphore) for post in due_posts))
+    duration = time.perf_counter() - started_at
+    closed_posts = [post for post, ok in zip(due_posts, archived, strict=True) if ok]
+    archive_failures = [
+        post for post, ok in zip(due_posts, archived, strict=True) if not ok
+    ]
+    close_candidates.difference_update(post.id for post in closed_posts)
 
     log_channel = cast(discord.TextChannel, bot.get_channel(config.LOG_CHANNEL_ID))
-    msg = f"Scanned {open_posts:,} open posts in {help_channel.mention}.\n"
+    msg = f"Checked {resolved_posts:,} resolved posts in {help_channel.mention}.\n"
     if closed_posts:
-        msg += f"Automatically closed {_post_list(closed_posts)}"
+        msg += (
+            f"Automatically closed {_post_list(closed_posts)}"
+            f"-# Took {duration:.1f}s ({len(closed_posts) / duration:.1f} posts/s)\n"
+        )
+    if archive_failures:
+        msg += f"Failed to close {_post_list(archive_failures)}"
     if failures:
         msg += f"Failed to check {_post_list(failures)}"
     await log_channel.send(msg)
 
 
-def _has_tag(post: discord.Thread, substring: str) -> bool:
-    return any(substring in tag.name.casefold() for tag in post.applied_tags)
+@autoclose_solved_posts.before_loop
+async def _find_close_candidates() -> None:
+    """A full scan is only needed once, events keep the candidates up to date."""
+    help_channel = cast(discord.ForumChannel, bot.get_channel(config.HELP_CHANNEL_ID))
+    for post in help_channel.threads:
+        _track(post)
 
 
 def _post_list(posts: Sequence[discord.Thread]) -> str:
@@ -0,0 +1,4 @@
+from .integration import get_docs_link
+from .sitemap import poll_sitemap, refresh_sitemap
+
+__all__ = ("get_docs_link", "poll_sitemap", "refresh_sitemap")
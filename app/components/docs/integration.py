@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, cast
+
+import discord
+from discord.app_commands import Choice, autocomplete
+
+from app.setup import bot
+
+from .sitemap import (
+    SEARCH_SECTION,
+    SECTIONS,
+    page_indexes,
+    search_index,
+    section_index,
+    sitemap,
+)
+
+if TYPE_CHECKING:
+    from .search import SearchResult
+
+URL_TEMPLATE = "https://ghostty.org/docs/{section}{page}"
+SEARCH_RESULT_SEPARATOR = ":"
+
+
+async def section_autocomplete(
+    _: discord.Interaction, current: str
+) -> list[Choice[str]]:
+    return [Choice(name=name, value=name) for name in section_index.search(current)]
+
+
+async def page_autocomplete(
+    interaction: discord.Interaction, current: str
+) -> list[Choice[str]]:
+    if not (interaction.data and (options := interaction.data.get("options"))):
+        return []
+    section = next(
+        (cast(str, opt["value"]) for opt in options if opt["name"] == "section"),
+        None,
+    )
+    # Discord only allows 25 options for autocomplete
+    if section == SEARCH_SECTION:
+        return [
+            Choice(name=f"{result.section}: {result.heading}", value=_encode(result))
+            for result in search_index.search(current, 25)
+        ]
+    if section is None or (index := page_indexes.get(section)) is None:
+        return []
+    return [Choice(name=name, value=name) for name in index.search(current, 25)]
+
+
+def _encode(result: SearchResult) -> str:
+    return f"{result.section}{SEARCH_RESULT_SEPARATOR}{result.heading}"
+
+
+def _search_docs(query: str) -> tuple[str, str]:
+    """
+    Takes either a result picked from autocomplete or a free-form query, whose
+    best match is used.
+    """
+    # Queries can contain the separator too, e.g. "vt: control"
+    section, sep, page = query.partition(SEARCH_RESULT_SEPARATOR)
+    if sep and page in sitemap.get(section, []):
+        return section, page
+    if not (results := search_index.search(query, 1)):
+        msg = f"No results for {query!r}"
+        raise ValueError(msg)
+    return results[0]
+
+
+@bot.tree.command(name="docs", description="Link a documentation page.")
+@autocomplete(section=section_autocomplete, page=page_autocomplete)
+@discord.app_commands.guild_only()
+async def docs(
+    interaction: discord.Interaction, section: str, page: str, message: str = ""
+) -> None:
+    try:
+        await interaction.response.send_message(
+            f"{message}\n{get_docs_link(section, page)}"
+        )
+    except ValueError as exc:
+        await interaction.response.send_message(str(exc), ephemeral=True)
+
+
+def get_docs_link(section: str, page: str) -> str:
+    if section == SEARCH_SECTION:
+        section, page = _search_docs(page)
+    if section not in SECTIONS:
+        msg = f"Invalid section {section!r}"
+        raise ValueError(msg)
+    if page not in sitemap.get(section, []):
+        msg = f"Invalid page {page!r}"
+        raise ValueError(msg)
+    return URL_TEMPLATE.format(
+        section=SECTIONS[section],
+        page=page if page != "overview" else "",
+    )
@@ -0,0 +1,94 @@
+import re
+from collections.abc import Iterable, Iterator
+
+WORD_BOUNDARY_REGEX = re.compile(r"[-_./ ]+")
+# Typos are only considered once there's enough of a query to go by
+MIN_TYPO_QUERY_LENGTH = 3
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        # Every name passing through this node, in ranking order
+        self.ids: list[int] = []
+
+
+class _Trie:
+    def __init__(self) -> None:
+        self._root = _TrieNode()
+
+    def insert(self, key: str, id_: int) -> None:
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            node.ids.append(id_)
+
+    def lookup(self, prefix: str) -> list[int]:
+        node = self._root
+        for char in prefix:
+            if (node := node.children.get(char)) is None:
+                return []
+        return node.ids
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Whether a single insertion, deletion or substitution turns a into b."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    for i, (x, y) in enumerate(zip(a, b, strict=False)):
+        if x != y:
+            skip = 0 if len(a) == len(b) else -1
+            return a[i + 1 + skip :] == b[i + 1 :]
+    return True
+
+
+class NameIndex:
+    """
+    Ranks names matching an autocomplete query: prefix matches first, then
+    matches at the start of a word (e.g. "size" in "font-size"), then any
+    substring, then names starting with a single typo. Shorter names come first
+    within each tier, and an empty query lists names in their original order.
+    """
+
+    def __init__(self, names: Iterable[str]) -> None:
+        self._names = list(dict.fromkeys(names))
+        self._folded = [name.casefold() for name in self._names]
+        self._by_length = sorted(
+            range(len(self._names)), key=lambda i: len(self._names[i])
+        )
+        self._prefixes = _Trie()
+        self._word_starts = _Trie()
+        for id_ in self._by_length:
+            name = self._folded[id_]
+            self._prefixes.insert(name, id_)
+            for boundary in WORD_BOUNDARY_REGEX.finditer(name):
+                self._word_starts.insert(name[boundary.end() :], id_)
+
+    def search(self, query: str, limit: int | None = None) -> list[str]:
+        results: dict[int, None] = {}
+        for id_ in self._rank(query.casefold()):
+            results[id_] = None
+            if len(results) == limit:
+                break
+        return [self._names[id_] for id_ in results]
+
+    def _rank(self, query: str) -> Iterator[int]:
+        if not query:
+            yield from range(len(self._names))
+            return
+        yield from self._prefixes.lookup(query)
+        yield from self._word_starts.lookup(query)
+        yield from (id_ for id_ in self._by_length if query in self._folded[id_])
+        if len(query) >= MIN_TYPO_QUERY_LENGTH:
+            yield from (
+                id_
+                for id_ in self._by_length
+                if any(
+                    _within_one_edit(query, self._folded[id_][:length])
+                    for length in range(len(query) - 1, len(query) + 2)
+                )
+            )
@@ -0,0 +1,120 @@
+import bisect
+import heapq
+import itertools
+import math
+import re
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from typing import NamedTuple
+
+TOKEN_REGEX = re.compile(r"[a-z0-9]+")
+# Heading terms are counted this many times, as they describe the whole section
+HEADING_WEIGHT = 3
+
+
+class SearchResult(NamedTuple):
+    section: str
+    heading: str
+
+
+def _tokenize(text: str) -> list[str]:
+    return TOKEN_REGEX.findall(text.casefold())
+
+
+def split_headings(text: str) -> Iterable[tuple[str, str]]:
+    """Splits a reference .mdx file into its `## ` headings and their paragraphs."""
+    heading: str | None = None
+    lines: list[str] = []
+    for line in [*text.splitlines(), "## "]:
+        if not line.startswith("## "):
+            lines.append(line)
+            continue
+        if heading:
+            yield heading, "\n".join(lines)
+        heading, lines = line.removeprefix("## ").strip("`"), []
+
+
+class SearchIndex:
+    """
+    An inverted index over documentation sections, ranked with BM25. Documents
+    are grouped by the file they came from, so that a changed file can be
+    reindexed without rebuilding everything else.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self) -> None:
+        self._results: dict[int, SearchResult] = {}
+        self._term_counts: dict[int, Counter[str]] = {}
+        self._lengths: dict[int, int] = {}
+        self._postings: defaultdict[str, dict[int, int]] = defaultdict(dict)
+        self._by_source: dict[str, list[int]] = {}
+        self._total_length = 0
+        self._ids = itertools.count()
+        # Sorted for expanding prefixes, rebuilt lazily after changes
+        self._vocabulary: list[str] | None = None
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def update_source(
+        self, source: str, section: str, documents: Iterable[tuple[str, str]]
+    ) -> None:
+        """Replaces all documents from the source with (heading, body) pairs."""
+        self.remove_source(source)
+        self._vocabulary = None
+        ids = self._by_source[source] = []
+        for heading, body in documents:
+            ids.append(id_ := next(self._ids))
+            terms = Counter(_tokenize(body))
+            for term in _tokenize(heading):
+                terms[term] += HEADING_WEIGHT
+            self._results[id_] = SearchResult(section, heading)
+            self._term_counts[id_] = terms
+            self._lengths[id_] = terms.total()
+            self._total_length += self._lengths[id_]
+            for term, count in terms.items():
+                self._postings[term][id_] = count
+
+    def remove_source(self, source: str) -> None:
+        self._vocabulary = None
+        for id_ in self._by_source.pop(source, ()):
+            del self._results[id_]
+            self._total_length -= self._lengths.pop(id_)
+            for term in self._term_counts.pop(id_):
+                del self._postings[term][id_]
+                if not self._postings[term]:
+                    del self._postings[term]
+
+    def _expand(self, prefix: str) -> Iterable[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        start = bisect.bisect_left(vocabulary, prefix)
+        return itertools.takewhile(
+            lambda term: term.startswith(prefix),
+            (vocabulary[i] for i in range(start, len(vocabulary))),
+        )
+
+    def search(self, query: str, limit: int) -> list[SearchResult]:
+        """
+        The last word of the query also matches longer terms, as it may still be
+        incomplete while the query is being typed.
+        """
+        if not self._results or not (tokens := _tokenize(query)):
+            return []
+        average_length = self._total_length / len(self._results)
+        scores: defaultdict[int, float] = defaultdict(float)
+        for term in {*tokens, *self._expand(tokens[-1])}:
+            if (postings := self._postings.get(term)) is None:
+                continue
+            idf = math.log(
+                1 + (len(self._results) - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            for id_, count in postings.items():
+                length = self._lengths[id_] / average_length
+                norm = self.K1 * (1 - self.B + self.B * length)
+                scores[id_] += idf * count * (self.K1 + 1) / (count + norm)
+        best = heapq.nlargest(limit, scores, key=scores.__getitem__)
+        return [self._results[id_] for id_ in best]
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from contextlib import suppress
+from functools import partial
+from typing import NamedTuple, NotRequired, TypedDict
+
+from discord.ext import tasks
+from githubkit.exception import GitHubException
+
+from app import persistence
+from app.ratelimit import RateLimitedError
+from app.setup import config, gh, gh_scheduler
+
+from .ranking import NameIndex
+from .search import SearchIndex, split_headings
+
+SECTIONS = {
+    "action": "config/keybind/reference#",
+    "config": "config/",
+    "help": "help/",
+    "install": "install/",
+    "keybind": "config/keybind/",
+    "option": "config/reference#",
+    "vt-concepts": "vt/concepts/",
+    "vt-control": "vt/control/",
+    "vt-csi": "vt/csi/",
+    "vt-esc": "vt/esc/",
+    "vt": "vt/",
+}
+# Not an actual section, but a full-text search over the references
+SEARCH_SECTION = "search"
+
+
+NAV_PATH = "docs/nav.json"
+REFERENCE_PATHS = {
+    "option": "docs/config/reference.mdx",
+    "action": "docs/config/keybind/reference.mdx",
+}
+DOC_PATHS = (NAV_PATH, *REFERENCE_PATHS.values())
+# Versioned like the entity caches' namespaces
+SNAPSHOT_NAMESPACE = "docs.v1"
+
+
+class DocFile(NamedTuple):
+    text: str
+    etag: str | None
+
+
+class Entry(TypedDict):
+    type: str
+    path: str
+    title: str
+    children: NotRequired[list[Entry]]
+
+
+def _load_children(
+    sitemap: dict[str, list[str]], path: str, children: list[Entry]
+) -> None:
+    sitemap[path] = []
+    for item in children:
+        sitemap[path].append((page := item["path"].lstrip("/")) or "overview")
+        if item["type"] == "folder":
+            _load_children(sitemap, f"{path}-{page}", item.get("children", []))
+
+
+def _build_sitemap(files: dict[str, str]) -> dict[str, list[str]]:
+    sitemap: dict[str, list[str]] = {}
+    # Reading vt/, install/, help/, config/,
+    # config/keybind/ subpages by reading nav.json
+    nav: list[Entry] = json.loads(files[NAV_PATH])["items"]
+    for entry in nav:
+        if entry["type"] != "folder":
+            continue
+        _load_children(sitemap, entry["path"].lstrip("/"), entry.get("children", []))
+
+    # Reading config references by parsing headings in .mdx files
+    for key, path in REFERENCE_PATHS.items():
+        sitemap[key] = [
+            line.removeprefix("## ").strip("`")
+            for line in files[path].splitlines()
+            if line.startswith("## ")
+        ]
+
+    # Manual adjustments
+    sitemap["install"].remove("release-notes")
+    sitemap["keybind"] = sitemap.pop("config-keybind")
+    del sitemap["install-release-notes"]
+    for vt_section in (s for s in SECTIONS if s.startswith("vt-")):
+        sitemap["vt"].remove(vt_section.removeprefix("vt-"))
+    return sitemap
+
+
+def _update_sitemap() -> None:
+    if doc_files.keys() >= set(DOC_PATHS):
+        new_sitemap = _build_sitemap({path: f.text for path, f in doc_files.items()})
+        sitemap.clear()
+        sitemap.update(new_sitemap)
+        page_indexes.clear()
+        page_indexes.update(
+            (section, NameIndex(pages)) for section, pages in sitemap.items()
+        )
+
+
+async def _fetch_file(path: str) -> bool:
+    """Returns whether the file changed since it was last fetched."""
+    headers = {"Accept": "application/vnd.github.raw+json"}
+    if (cached := doc_files.get(path)) is not None and cached.etag is not None:
+        headers["If-None-Match"] = cached.etag
+    resp = await gh_scheduler.request(
+        "core",
+        partial(
+            gh.rest.repos.async_get_content,
+            config.GITHUB_ORG,
+            config.GITHUB_REPOS["web"],
+            path,
+            headers=headers,
+        ),
+    )
+    if resp.status_code == 304:
+        return False
+    doc_files[path] = DocFile(resp.text, resp.headers.get("ETag"))
+    # A 200 can still carry the same content, e.g. after an ETag change
+    return cached is None or cached.text != resp.text
+
+
+def _index_reference(section: str) -> None:
+    path = REFERENCE_PATHS[section]
+    if (file := doc_files.get(path)) is not None:
+        search_index.update_source(path, section, split_headings(file.text))
+
+
+async def refresh_sitemap() -> None:
+    results = await asyncio.gather(*map(_fetch_file, DOC_PATHS), return_exceptions=True)
+    # Files that did change are already stored, and would come back as unchanged
+    # next time, so they have to be applied even if another fetch failed
+    if any(changed := [result is True for result in results]):
+        await _apply_changes(changed)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+async def _apply_changes(changed: list[bool]) -> None:
+    _update_sitemap()
+    # Only the reference files that changed are reindexed
+    for section, path in REFERENCE_PATHS.items():
+        if changed[DOC_PATHS.index(path)]:
+            _index_reference(section)
+    await asyncio.to_thread(
+        persistence.save,
+        SNAPSHOT_NAMESPACE,
+        [(path, time.time(), file._asdict()) for path, file in doc_files.items()],
+    )
+
+
+@tasks.loop(hours=1)
+async def poll_sitemap() -> None:
+    # Retried on the next run, the previous sitemap is still good until then
+    with suppress(GitHubException, RateLimitedError):
+        await refresh_sitemap()
+
+
+def _load_snapshot() -> None:
+    """Lets the bot start with the last known sitemap, without any requests."""
+    for path, _, data in persistence.load(SNAPSHOT_NAMESPACE):
+        with suppress(TypeError):
+            doc_files[path] = DocFile(**data)
+    _update_sitemap()
+    for section in REFERENCE_PATHS:
+        _index_reference(section)
+
+
+doc_files: dict[str, DocFile] = {}
+sitemap: dict[str, list[str]] = {}
+# Autocomplete indexes, rebuilt along with the sitemap
+page_indexes: dict[str, NameIndex] = {}
+section_index = NameIndex([*SECTIONS, SEARCH_SECTION])
+# Full-text search over the config references
+search_index = SearchIndex()
+_load_snapshot()
@@ -1,10 +1,20 @@
+from .cache import load_caches, save_caches, sweep_caches
 from .fmt import entity_message, load_emojis
-from .integration import reply_with_entities
+from .integration import MENTION_ROUTE, remove_expired_buttons, reply_with_entities
+from .prefetch import prefetch_entities
 from .resolution import ENTITY_REGEX
+from .webhooks import start_webhook_server
 
 __all__ = (
     "ENTITY_REGEX",
+    "MENTION_ROUTE",
     "entity_message",
+    "load_caches",
     "load_emojis",
+    "prefetch_entities",
+    "remove_expired_buttons",
     "reply_with_entities",
+    "save_caches",
+    "start_webhook_server",
+    "sweep_caches",
 )
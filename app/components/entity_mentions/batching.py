@@ -0,0 +1,76 @@
+import asyncio
+import contextvars
+from collections.abc import Callable, Coroutine, Hashable, Iterable, Mapping, Sequence
+from functools import partial
+from typing import Any
+
+from app.ratelimit import Priority, request_priority
+
+
+class _Batch[KT: Hashable, VT]:
+    def __init__(self, timer: asyncio.TimerHandle) -> None:
+        self.keys: dict[KT, None] = {}
+        self.priority = Priority.BACKGROUND
+        self.future = asyncio.get_running_loop().create_future()
+        self.timer = timer
+
+
+def _copy_outcome[T](target: asyncio.Future[T], source: asyncio.Future[T]) -> None:
+    if source.cancelled():
+        target.cancel()
+    elif (exc := source.exception()) is not None:
+        target.set_exception(exc)
+        # Already reported to every waiting caller
+        target.exception()
+    else:
+        target.set_result(source.result())
+
+
+class BatchLoader[KT: Hashable, VT]:
+    """
+    Collects keys requested within a short window and loads them all in one
+    deduplicated call, handing each caller back only the results for its keys.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[Sequence[KT]], Coroutine[Any, Any, Mapping[KT, VT]]],
+        window: float,
+        max_batch_size: int,
+    ) -> None:
+        self._load = load
+        self._window = window
+        self._max_batch_size = max_batch_size
+        self._batch: _Batch[KT, VT] | None = None
+        self._running: set[asyncio.Task[Mapping[KT, VT]]] = set()
+
+    async def load_many(self, keys: Iterable[KT]) -> dict[KT, VT]:
+        keys = list(dict.fromkeys(keys))
+        results: dict[KT, VT] = {}
+        for future in {self._add(key) for key in keys}:
+            # One caller giving up mustn't cancel the batch for everyone else
+            results |= await asyncio.shield(future)
+        return {key: results[key] for key in keys if key in results}
+
+    def _add(self, key: KT) -> asyncio.Future[Mapping[KT, VT]]:
+        if (batch := self._batch) is None:
+            timer = asyncio.get_running_loop().call_later(self._window, self._flush)
+            batch = self._batch = _Batch(timer)
+        batch.keys[key] = None
+        # Interactive callers mustn't be shed because a background one came first
+        batch.priority = min(batch.priority, request_priority.get())
+        if len(batch.keys) >= self._max_batch_size:
+            self._flush()
+        return batch.future
+
+    def _flush(self) -> None:
+        if (batch := self._batch) is None:
+            return
+        self._batch = None
+        batch.timer.cancel()
+        context = contextvars.copy_context()
+        context.run(request_priority.set, batch.priority)
+        task = asyncio.create_task(self._load(list(batch.keys)), context=context)
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+        task.add_done_callback(partial(_copy_outcome, batch.future))
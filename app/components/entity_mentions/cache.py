@@ -1,33 +1,71 @@
+import asyncio
 import datetime as dt
 from abc import ABC, abstractmethod
-from typing import Literal, Protocol, cast
+from collections.abc import Hashable, Iterable, Sequence
+from functools import partial
+from typing import Any, NamedTuple
 
+from discord.ext import tasks
 from githubkit.exception import RequestFailed
 
-from app.setup import gh
+from app import persistence
+from app.ratelimit import Priority, request_priority
+from app.setup import config, gh, gh_scheduler
 
-from .discussions import get_discussion
+from .batching import BatchLoader
+from .entities import (
+    CacheKey,
+    Entity,
+    dump_entity,
+    entity_from_issue,
+    get_entities,
+    load_entity,
+)
+from .eviction import EvictionPolicy, LRUPolicy, TinyLFUPolicy, approx_size
+from .registry import mention_replies
 
-type CacheKey = tuple[str, str, int]
-type EntityKind = Literal["Pull Request", "Issue", "Discussion"]
+WEBHOOK_TTR = dt.timedelta(hours=6)
+MAX_GRAPHQL_BATCH_SIZE = 100
 
 
-class GitHubUser(Protocol):
-    login: str
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
 
 
-class Entity(Protocol):
-    number: int
-    title: str
-    html_url: str
-    user: GitHubUser
-    created_at: dt.datetime
+class CacheLimits(NamedTuple):
+    max_entries: int | None = None
+    max_size: int | None = None  # Approximate, in bytes
 
 
-class TTRCache[KT, VT](ABC):
-    def __init__(self, ttr: int) -> None:
+class TTRCache[KT: Hashable, VT](ABC):
+    def __init__(
+        self,
+        ttr: int,
+        expiry: int | None = None,
+        *,
+        limits: CacheLimits | None = None,
+        policy: EvictionPolicy[KT] | None = None,
+        negative_ttl: int = 0,
+    ) -> None:
         self._ttr = dt.timedelta(seconds=ttr)
+        # Between the TTR and the hard expiry, the stale value is served right away
+        # while a refresh runs in the background
+        self._expiry = dt.timedelta(seconds=ttr if expiry is None else expiry)
         self._cache: dict[KT, tuple[dt.datetime, VT]] = {}
+        self._pending: dict[KT, asyncio.Task[None]] = {}
+        # Keys known not to exist are skipped for a while instead of being refetched
+        self._negative_ttl = dt.timedelta(seconds=negative_ttl)
+        self._missing: dict[KT, dt.datetime] = {}
+
+        self._limits = limits or CacheLimits()
+        self._policy = policy or LRUPolicy()
+        self._sizes: dict[KT, int] = {}
+        self._size = 0
+        self._hits = self._misses = self._evictions = 0
 
     def __contains__(self, key: KT) -> bool:
         return key in self._cache
@@ -36,38 +74,336 @@ class TTRCache[KT, VT](ABC):
         return self._cache[key]
 
     def __setitem__(self, key: KT, value: VT) -> None:
+        self._store(key, value, dt.datetime.now(tz=dt.UTC))
+
+    def _store(self, key: KT, value: VT, timestamp: dt.datetime) -> None:
+        is_new = key not in self
+        if not is_new:
+            self._size -= self._sizes[key]
+        self._missing.pop(key, None)
+        self._cache[key] = (timestamp, value)
+        self._sizes[key] = approx_size(value)
+        self._size += self._sizes[key]
+        if is_new:
+            # Made room for before the policy knows about the key, so that it can't
+            # be picked as its own victim (e.g. by LFU, as the least used key)
+            self._evict(keep=1)
+        self._policy.insert(key)
+        self._evict()
+
+    def __delitem__(self, key: KT) -> None:
+        del self._cache[key]
+        self._size -= self._sizes.pop(key)
+        self._policy.remove(key)
+
+    def touch(self, key: KT) -> None:
+        """Marks the entry as freshly fetched without changing its value."""
+        _, value = self[key]
         self._cache[key] = (dt.datetime.now(tz=dt.UTC), value)
 
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            self._hits, self._misses, self._evictions, len(self), self._size
+        )
+
+    def _is_over_limit(self) -> bool:
+        max_entries, max_size = self._limits
+        return (max_entries is not None and len(self) > max_entries) or (
+            max_size is not None and self._size > max_size
+        )
+
+    def _evict(self, keep: int = 0) -> None:
+        while len(self) > keep and self._is_over_limit():
+            del self[self._policy.victim()]
+            self._evictions += 1
+
+    def sweep(self) -> None:
+        """Drops all entries past their hard expiry."""
+        for key in [key for key in self._cache if self._is_expired(key)]:
+            del self[key]
+        for key in [key for key in self._missing if not self._is_missing(key)]:
+            del self._missing[key]
+
+    def mark_missing(self, key: KT) -> None:
+        """Records that the key doesn't exist (as opposed to failing to fetch)."""
+        if key in self:
+            del self[key]
+        self._missing[key] = dt.datetime.now(tz=dt.UTC)
+
+    def _is_missing(self, key: KT) -> bool:
+        if (timestamp := self._missing.get(key)) is None:
+            return False
+        return dt.datetime.now(tz=dt.UTC) - timestamp < self._negative_ttl
+
+    def _encode(self, key: KT, value: VT) -> tuple[Any, Any]:
+        return key, value
+
+    def _decode(self, key: Any, value: Any) -> tuple[KT, VT]:
+        return key, value
+
+    def snapshot(self) -> list[persistence.Entry]:
+        entries: list[persistence.Entry] = []
+        for key, (timestamp, value) in self._cache.items():
+            encoded_key, encoded_value = self._encode(key, value)
+            entries.append((encoded_key, timestamp.timestamp(), encoded_value))
+        return entries
+
+    def restore(self, entries: Iterable[persistence.Entry]) -> None:
+        """
+        Loads entries with their original fetch timestamps, skipping expired ones,
+        ones that were already fetched again and ones that can't be decoded.
+        """
+        for encoded_key, ts, encoded_value in entries:
+            try:
+                key, value = self._decode(encoded_key, encoded_value)
+            except (KeyError, TypeError, ValueError):
+                continue
+            timestamp = dt.datetime.fromtimestamp(ts, tz=dt.UTC)
+            if key in self or dt.datetime.now(tz=dt.UTC) - timestamp >= self._expiry:
+                continue
+            self._store(key, value, timestamp)
+
+    def _record_access(self, key: KT) -> None:
+        if self._is_missing(key) or not self._is_expired(key):
+            self._hits += 1
+            self._policy.access(key)
+        else:
+            self._misses += 1
+
     @abstractmethod
     async def fetch(self, key: KT) -> None:
         pass
 
-    async def _refresh(self, key: KT) -> None:
+    async def fetch_many(self, keys: Sequence[KT]) -> None:
+        await asyncio.gather(*map(self.fetch, keys))
+
+    def _is_older_than(self, key: KT, age: dt.timedelta) -> bool:
         if key not in self:
-            await self.fetch(key)
-            return
+            return True
         timestamp, *_ = self[key]
-        if dt.datetime.now(tz=dt.UTC) - timestamp >= self._ttr:
-            await self.fetch(key)
+        return dt.datetime.now(tz=dt.UTC) - timestamp >= age
 
-    async def get(self, key: KT) -> VT:
-        await self._refresh(key)
-        _, value = self[key]
-        return value
+    def _ttr_for(self, _key: KT) -> dt.timedelta:
+        return self._ttr
+
+    def _is_stale(self, key: KT) -> bool:
+        return self._is_older_than(key, self._ttr_for(key))
+
+    def _is_expired(self, key: KT) -> bool:
+        return self._is_older_than(key, self._expiry)
+
+    async def _fetch_many_with_priority(
+        self, keys: Sequence[KT], priority: Priority
+    ) -> None:
+        # Runs in its own task, so this doesn't leak to the caller's context
+        request_priority.set(priority)
+        await self.fetch_many(keys)
+
+    def _schedule(
+        self, keys: Sequence[KT], priority: Priority = Priority.INTERACTIVE
+    ) -> set[asyncio.Task[None]]:
+        """
+        Returns the fetches covering the given keys, starting a new one only for
+        keys without a fetch already in flight.
+        """
+        if new_keys := [key for key in keys if key not in self._pending]:
+            task = asyncio.create_task(
+                self._fetch_many_with_priority(new_keys, priority)
+            )
+            self._pending |= dict.fromkeys(new_keys, task)
+            task.add_done_callback(partial(self._unschedule, new_keys))
+        return {self._pending[key] for key in keys}
+
+    def _unschedule(self, keys: Sequence[KT], task: asyncio.Task[None]) -> None:
+        for key in keys:
+            if self._pending.get(key) is task:
+                del self._pending[key]
+        # Failed background refreshes are retried on the next access
+        if not task.cancelled():
+            task.exception()
+
+    async def get_many(self, keys: Iterable[KT]) -> dict[KT, VT]:
+        """
+        Refreshes all stale keys in one batch, only waiting for expired ones.
+        Keys that don't exist or failed to resolve are omitted.
+        """
+        keys = list(dict.fromkeys(keys))
+        for key in keys:
+            self._record_access(key)
+        keys = [key for key in keys if not self._is_missing(key)]
+        if stale := [key for key in keys if self._is_stale(key)]:
+            # Stale keys are refreshed in the same batch as the expired ones
+            # someone is waiting for, or in the background if there are none
+            if any(self._is_expired(key) for key in stale):
+                await asyncio.wait(self._schedule(stale))
+            else:
+                self._schedule(stale, Priority.BACKGROUND)
+        return {key: self[key][1] for key in keys if not self._is_expired(key)}
 
 
-class EntityCache(TTRCache[CacheKey, tuple[EntityKind, Entity]]):
+class EntityCache(TTRCache[CacheKey, Entity]):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Conditional request headers for revalidating issues and PRs via REST.
+        # GitHub doesn't count 304 responses against the rate limit.
+        self._validators: dict[CacheKey, dict[str, str]] = {}
+        # Set once the webhook server is up, not just configured
+        self.receives_webhooks = False
+        # Merges lookups from concurrent mentions into shared GraphQL requests
+        self._loader = BatchLoader(
+            get_entities,
+            window=config.ENTITY_BATCH_WINDOW,
+            max_batch_size=MAX_GRAPHQL_BATCH_SIZE,
+        )
+
+    def __delitem__(self, key: CacheKey) -> None:
+        super().__delitem__(key)
+        self._validators.pop(key, None)
+
+    def _ttr_for(self, key: CacheKey) -> dt.timedelta:
+        # Entities in our own repos are kept up to date by webhooks, if enabled
+        if self.receives_webhooks and key[0] == config.GITHUB_ORG:
+            return WEBHOOK_TTR
+        return super()._ttr_for(key)
+
     async def fetch(self, key: CacheKey) -> None:
+        await self.fetch_many([key])
+
+    async def fetch_many(self, keys: Sequence[CacheKey]) -> None:
+        # Discussions aren't available over REST, and unknown entities are cheaper
+        # to look up in one GraphQL batch than to revalidate one by one
+        fetched: list[CacheKey] = []
+        revalidated: list[CacheKey] = []
+        for key in keys:
+            is_known_issue = key in self and self[key][1].kind != "Discussion"
+            (revalidated if is_known_issue else fetched).append(key)
+        await asyncio.gather(
+            self._fetch_batch(fetched), *map(self._revalidate, revalidated)
+        )
+
+    async def _fetch_batch(self, keys: Sequence[CacheKey]) -> None:
+        if not keys:
+            return
+        for key, entity in (await self._loader.load_many(keys)).items():
+            if entity is None:
+                self.mark_missing(key)
+            else:
+                self[key] = entity
+
+    async def _revalidate(self, key: CacheKey) -> None:
         try:
-            entity = (await gh.rest.issues.async_get(*key)).parsed_data
-            kind = "Issue"
-            if entity.pull_request:
-                entity = (await gh.rest.pulls.async_get(*key)).parsed_data
-                kind = "Pull Request"
-        except RequestFailed:
-            entity = await get_discussion(*key)
-            kind = "Discussion"
-        self[key] = (kind, cast(Entity, entity))
-
-
-entity_cache = EntityCache(1800)  # 30 minutes
+            resp = await gh_scheduler.request(
+                "core",
+                partial(
+                    gh.rest.issues.async_get,
+                    *key,
+                    headers=self._validators.get(key, {}),
+                ),
+            )
+        except RequestFailed as exc:
+            # 410 Gone is returned for deleted issues
+            if exc.response.status_code not in (404, 410):
+                raise
+            self.mark_missing(key)
+            return
+        if resp.status_code == 304:
+            if key in self:
+                self.touch(key)
+            return
+        self[key] = entity_from_issue(resp.parsed_data)
+        self._validators[key] = {
+            header: value
+            for header, value in (
+                ("If-None-Match", resp.headers.get("ETag")),
+                ("If-Modified-Since", resp.headers.get("Last-Modified")),
+            )
+            if value is not None
+        }
+
+    def _encode(self, key: CacheKey, value: Entity) -> tuple[Any, Any]:
+        return key, dump_entity(value)
+
+    def _decode(self, key: Any, value: Any) -> tuple[CacheKey, Entity]:
+        owner, repo, number = key
+        return (owner, repo, number), load_entity(value)
+
+
+class OwnerCache(TTRCache[str, str]):
+    async def fetch(self, key: str) -> None:
+        if (owner := await find_repo_owner(key)) is None:
+            self.mark_missing(key)
+        else:
+            self[key] = owner
+
+
+async def find_repo_owner(name: str) -> str | None:
+    resp = await gh_scheduler.request(
+        "search",
+        partial(
+            gh.rest.search.async_repos, q=name, sort="stars", order="desc", per_page=20
+        ),
+    )
+    return next(
+        (
+            r.owner.login
+            for r in resp.parsed_data.items
+            if r.name == name and r.owner is not None
+        ),
+        None,
+    )
+
+
+entity_cache = EntityCache(
+    600,  # 10 minutes
+    expiry=86400,  # 1 day
+    limits=CacheLimits(max_entries=10_000, max_size=32 * 1024 * 1024),
+    policy=TinyLFUPolicy(10_000),
+    negative_ttl=300,  # 5 minutes
+)
+owner_cache = OwnerCache(
+    3600,  # 1 hour
+    expiry=604800,  # 1 week
+    limits=CacheLimits(max_entries=2_000),
+    negative_ttl=3600,  # 1 hour
+)
+
+
+# Namespaces are versioned, so that a change to an encoded format leaves the old
+# snapshots behind instead of loading them
+PERSISTED_CACHES: dict[str, persistence.Persistent] = {
+    "entities.v2": entity_cache,
+    "owners": owner_cache,
+    "replies.v1": mention_replies,
+}
+restored_namespaces: set[str] = set()
+
+
+async def load_caches() -> None:
+    """
+    on_ready runs again after reconnecting, when restoring the snapshots would
+    bring back entries dropped since then, so each is only restored once.
+    """
+    for namespace, cache in PERSISTED_CACHES.items():
+        if namespace not in restored_namespaces:
+            restored_namespaces.add(namespace)
+            cache.restore(await asyncio.to_thread(persistence.load, namespace))
+
+
+def save_caches() -> None:
+    for namespace, cache in PERSISTED_CACHES.items():
+        persistence.save(namespace, cache.snapshot())
+
+
+@tasks.loop(minutes=10)
+async def sweep_caches() -> None:
+    for name, cache in (("Entity", entity_cache), ("Owner", owner_cache)):
+        cache.sweep()
+        hits, misses, evictions, entries, size = cache.stats
+        print(
+            f"{name} cache: {entries:,} entries (~{size:,} bytes), {hits:,} hits,"
+            f" {misses:,} misses, {evictions:,} evictions"
+        )
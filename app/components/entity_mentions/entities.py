@@ -0,0 +1,214 @@
+import datetime as dt
+from collections.abc import Sequence
+from functools import partial
+from typing import Any, Literal, NamedTuple
+
+from githubkit.exception import GraphQLFailed
+from githubkit.graphql import GraphQLResponse
+from githubkit.versions.latest.models import Issue
+
+from app.setup import gh, gh_scheduler
+
+type CacheKey = tuple[str, str, int]
+type EntityKind = Literal["Pull Request", "Issue", "Discussion"]
+
+
+class Entity(NamedTuple):
+    """The few fields needed for rendering a mention, and nothing else."""
+
+    kind: EntityKind
+    number: int
+    title: str
+    html_url: str
+    author: str
+    created_at: dt.datetime
+    state: str | None = None
+    state_reason: str | None = None
+    draft: bool = False
+    merged: bool = False
+    answered: bool = False
+
+
+ENTITY_KINDS: dict[str, EntityKind] = {
+    "Discussion": "Discussion",
+    "Issue": "Issue",
+    "PullRequest": "Pull Request",
+}
+
+ISSUE_FRAGMENTS = """
+fragment issue on Issue {
+  __typename
+  title
+  number
+  user: author { login }
+  created_at: createdAt
+  html_url: url
+  state
+  state_reason: stateReason
+}
+
+fragment pull on PullRequest {
+  __typename
+  title
+  number
+  user: author { login }
+  created_at: createdAt
+  html_url: url
+  state
+  draft: isDraft
+  merged
+}
+"""
+
+DISCUSSION_FRAGMENT = """
+fragment discussion on Discussion {
+  __typename
+  title
+  number
+  user: author { login }
+  created_at: createdAt
+  html_url: url
+  answered: isAnswered
+}
+"""
+
+RECENT_DISCUSSIONS_QUERY = (
+    """
+query getRecentDiscussions($owner: String!, $repo: String!, $cursor: String) {
+  repository(owner: $owner, name: $repo) {
+    discussions(
+      first: 50, after: $cursor, orderBy: {field: UPDATED_AT, direction: DESC}
+    ) {
+      pageInfo { hasNextPage endCursor }
+      nodes { updated_at: updatedAt ...discussion }
+    }
+  }
+}
+"""
+    + DISCUSSION_FRAGMENT
+)
+
+# Issues, PRs and discussions share a numbering, so every mention is looked up as
+# both an issue/PR and a discussion, only one of which will resolve.
+ENTITY_FIELD_TEMPLATE = """
+  e{i}: repository(owner: $owner{i}, name: $repo{i}) {{
+    issueOrPullRequest(number: $number{i}) {{ ...issue ...pull }}
+    discussion(number: $number{i}) {{ ...discussion }}
+  }}
+"""
+
+
+def _build_query(keys: Sequence[CacheKey]) -> tuple[str, dict[str, Any]]:
+    params: list[str] = []
+    fields: list[str] = []
+    variables: dict[str, Any] = {}
+    for i, (owner, repo, number) in enumerate(keys):
+        params.append(f"$owner{i}: String!, $repo{i}: String!, $number{i}: Int!")
+        fields.append(ENTITY_FIELD_TEMPLATE.format(i=i))
+        variables |= {f"owner{i}": owner, f"repo{i}": repo, f"number{i}": number}
+    query = f"query getEntities({', '.join(params)}) {{{''.join(fields)}}}"
+    return query + ISSUE_FRAGMENTS + DISCUSSION_FRAGMENT, variables
+
+
+def _build_entity(kind: EntityKind, data: dict[str, Any]) -> Entity:
+    # Authors of deleted accounts are returned as null
+    user = data.get("user") or {"login": "ghost"}
+    state, state_reason = data.get("state"), data.get("state_reason")
+    return Entity(
+        kind=kind,
+        number=data["number"],
+        title=data["title"],
+        html_url=data["html_url"],
+        author=user["login"],
+        created_at=dt.datetime.fromisoformat(data["created_at"]),
+        state=state and state.lower(),
+        state_reason=state_reason and state_reason.lower(),
+        draft=bool(data.get("draft")),
+        merged=bool(data.get("merged")),
+        answered=bool(data.get("answered")),
+    )
+
+
+def parse_entity(data: dict[str, Any]) -> Entity:
+    return _build_entity(ENTITY_KINDS[data["__typename"]], data)
+
+
+def entity_from_webhook(kind: EntityKind, data: dict[str, Any]) -> Entity:
+    """
+    Converts an issue, pull request or discussion from a webhook payload, whose
+    fields mostly match the aliases used in the GraphQL fragments.
+    """
+    return _build_entity(
+        kind, data | {"answered": data.get("answer_chosen_at") is not None}
+    )
+
+
+def entity_from_issue(issue: Issue) -> Entity:
+    """Converts a REST issue, which also covers the state of pull requests."""
+    return Entity(
+        kind="Pull Request" if issue.pull_request else "Issue",
+        number=issue.number,
+        title=issue.title,
+        html_url=issue.html_url,
+        author=issue.user.login if issue.user else "ghost",
+        created_at=issue.created_at,
+        state=issue.state,
+        state_reason=issue.state_reason or None,
+        draft=bool(issue.draft),
+        merged=bool(issue.pull_request and issue.pull_request.merged_at),
+    )
+
+
+def dump_entity(entity: Entity) -> dict[str, Any]:
+    return entity._asdict() | {"created_at": entity.created_at.isoformat()}
+
+
+def load_entity(data: dict[str, Any]) -> Entity:
+    return Entity(
+        **data | {"created_at": dt.datetime.fromisoformat(data["created_at"])}
+    )
+
+
+async def graphql_request(query: str, variables: dict[str, Any]) -> dict[str, Any]:
+    resp = await gh_scheduler.request(
+        "graphql",
+        partial(
+            gh.arequest,
+            "POST",
+            "/graphql",
+            json=gh.graphql.build_graphql_request(query, variables),
+            response_model=GraphQLResponse,
+        ),
+    )
+    return gh.graphql.parse_graphql_response(resp)
+
+
+async def get_entities(keys: Sequence[CacheKey]) -> dict[CacheKey, Entity | None]:
+    """
+    Resolves all entities in a single GraphQL request. Entities that don't exist
+    are mapped to None, while ones that failed to resolve are omitted.
+    """
+    failed: set[str | int] = set()
+    try:
+        data = await graphql_request(*_build_query(keys))
+    except GraphQLFailed as exc:
+        # Lookups that didn't resolve (e.g. the discussion half of an issue
+        # mention) are reported as errors alongside the partial data
+        if (data := exc.response.data) is None:
+            raise
+        for error in exc.response.errors or ():
+            if not error.path:
+                raise
+            if error.type != "NOT_FOUND":
+                failed.add(error.path[0])
+
+    entities: dict[CacheKey, Entity | None] = {}
+    for i, key in enumerate(keys):
+        if (alias := f"e{i}") in failed:
+            continue
+        if not (repo := data.get(alias)):
+            entities[key] = None
+            continue
+        entity = repo["issueOrPullRequest"] or repo["discussion"]
+        entities[key] = entity and parse_entity(entity)
+    return entities
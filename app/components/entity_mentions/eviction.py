@@ -0,0 +1,210 @@
+import sys
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+
+
+def approx_size(obj: object, _seen: set[int] | None = None) -> int:
+    """A rough deep sys.getsizeof(), counting shared objects only once."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    children: Iterable[object]
+    match obj:
+        case str() | bytes() | int() | float() | None:
+            return size
+        case dict():
+            children = (*obj.keys(), *obj.values())
+        case tuple() | list() | set() | frozenset():
+            children = obj
+        case _ if hasattr(obj, "__dict__"):
+            children = (vars(obj),)
+        case _:
+            slots = getattr(type(obj), "__slots__", ())
+            children = (getattr(obj, slot, None) for slot in slots)
+    return size + sum(approx_size(child, _seen) for child in children)
+
+
+class EvictionPolicy[KT: Hashable](ABC):
+    @abstractmethod
+    def insert(self, key: KT) -> None:
+        pass
+
+    @abstractmethod
+    def access(self, key: KT) -> None:
+        pass
+
+    @abstractmethod
+    def remove(self, key: KT) -> None:
+        pass
+
+    @abstractmethod
+    def victim(self) -> KT:
+        """Picks the key to evict next. The cache then calls remove() on it."""
+
+
+class LRUPolicy[KT: Hashable](EvictionPolicy[KT]):
+    def __init__(self) -> None:
+        self._keys: OrderedDict[KT, None] = OrderedDict()
+
+    def insert(self, key: KT) -> None:
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+
+    def access(self, key: KT) -> None:
+        if key in self._keys:
+            self._keys.move_to_end(key)
+
+    def remove(self, key: KT) -> None:
+        self._keys.pop(key, None)
+
+    def victim(self) -> KT:
+        return next(iter(self._keys))
+
+
+class LFUPolicy[KT: Hashable](EvictionPolicy[KT]):
+    """Evicts the least frequently used key, oldest first among ties."""
+
+    def __init__(self) -> None:
+        self._counts: dict[KT, int] = {}
+        self._buckets: dict[int, OrderedDict[KT, None]] = {}
+        self._min_count = 0
+
+    def _move(self, key: KT, count: int) -> None:
+        if (old_count := self._counts.get(key)) is not None:
+            bucket = self._buckets[old_count]
+            del bucket[key]
+            if not bucket:
+                del self._buckets[old_count]
+                if self._min_count == old_count:
+                    self._min_count = count
+        self._counts[key] = count
+        self._buckets.setdefault(count, OrderedDict())[key] = None
+
+    def insert(self, key: KT) -> None:
+        if key in self._counts:
+            self.access(key)
+            return
+        self._move(key, 1)
+        self._min_count = 1
+
+    def access(self, key: KT) -> None:
+        if key in self._counts:
+            self._move(key, self._counts[key] + 1)
+
+    def remove(self, key: KT) -> None:
+        if (count := self._counts.pop(key, None)) is None:
+            return
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+            if self._min_count == count:
+                self._min_count = min(self._buckets, default=0)
+
+    def victim(self) -> KT:
+        return next(iter(self._buckets[self._min_count]))
+
+
+class FrequencySketch[KT: Hashable]:
+    """
+    A count-min sketch estimating how often keys were seen. All counters are
+    halved periodically so that old popularity fades out.
+    """
+
+    # Odd 64-bit multipliers, one per row. Hashing (seed, key) tuples instead gave
+    # indexes so correlated across rows that keys collided in all of them at once.
+    SEEDS = (
+        0x9E3779B97F4A7C15,
+        0xC2B2AE3D27D4EB4F,
+        0x165667B19E3779F9,
+        0x27D4EB2F165667C5,
+    )
+
+    def __init__(self, width: int) -> None:
+        self._width = 1 << max(width - 1, 1).bit_length()
+        self._shift = 64 - self._width.bit_length() + 1
+        self._rows = [bytearray(self._width) for _ in self.SEEDS]
+        self._samples = 0
+        self._sample_limit = 10 * self._width
+
+    def _indexes(self, key: KT) -> Iterable[tuple[bytearray, int]]:
+        # Multiplicative hashing, taking the top bits of each product
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        return (
+            (row, (h * seed & 0xFFFFFFFFFFFFFFFF) >> self._shift)
+            for seed, row in zip(self.SEEDS, self._rows, strict=True)
+        )
+
+    def increment(self, key: KT) -> None:
+        for row, index in self._indexes(key):
+            if row[index] < 255:
+                row[index] += 1
+        self._samples += 1
+        if self._samples >= self._sample_limit:
+            self._samples //= 2
+            for row in self._rows:
+                row[:] = bytes(count >> 1 for count in row)
+
+    def estimate(self, key: KT) -> int:
+        return min(row[index] for row, index in self._indexes(key))
+
+
+class TinyLFUPolicy[KT: Hashable](EvictionPolicy[KT]):
+    """
+    New keys land in a small LRU admission window, which overflows into the main
+    LRU area until that's full. From then on, the window's oldest key only makes
+    it into the main area if it was requested more often than that area's own
+    eviction candidate; otherwise it's evicted. This keeps one-off mentions from
+    pushing out popular entities.
+    """
+
+    def __init__(self, capacity: int, window_ratio: float = 0.01) -> None:
+        self._sketch = FrequencySketch[KT](capacity)
+        self._window_size = max(int(capacity * window_ratio), 16)
+        self._main_size = max(capacity - self._window_size, 1)
+        self._window: OrderedDict[KT, None] = OrderedDict()
+        self._main: OrderedDict[KT, None] = OrderedDict()
+
+    def insert(self, key: KT) -> None:
+        self._sketch.increment(key)
+        if key in self._main:
+            self._main.move_to_end(key)
+            return
+        self._window[key] = None
+        self._window.move_to_end(key)
+        self._drain()
+
+    def _drain(self) -> None:
+        """Moves keys overflowing the window into the main area while it has room."""
+        while (
+            len(self._window) > self._window_size and len(self._main) < self._main_size
+        ):
+            self._main[self._window.popitem(last=False)[0]] = None
+
+    def access(self, key: KT) -> None:
+        self._sketch.increment(key)
+        for area in (self._window, self._main):
+            if key in area:
+                area.move_to_end(key)
+
+    def remove(self, key: KT) -> None:
+        self._window.pop(key, None)
+        self._main.pop(key, None)
+        self._drain()
+
+    def victim(self) -> KT:
+        if not self._window or not self._main:
+            return next(iter(self._window or self._main))
+        candidate = next(iter(self._window))
+        main_victim = next(iter(self._main))
+        if self._sketch.estimate(candidate) <= self._sketch.estimate(main_victim):
+            return candidate
+        # Admitted in place of the main area's candidate, which is removed next
+        del self._window[candidate]
+        self._main[candidate] = None
+        return main_victim
@@ -1,17 +1,25 @@
 from __future__ import annotations
 
-import asyncio
-from typing import cast
+from functools import lru_cache
+from typing import TYPE_CHECKING, cast
 
 import discord
-from githubkit.versions.latest.models import Issue, PullRequest
 
-from app.components.entity_mentions.resolution import resolve_repo_signatures
+from app.components.entity_mentions.resolution import (
+    parse_signatures,
+    resolve_signatures,
+)
 from app.setup import bot, config
 
-from .cache import Entity, EntityKind, entity_cache
+from .cache import entity_cache
+
+if TYPE_CHECKING:
+    from .entities import Entity
+    from .resolution import Signature
 
-ENTITY_TEMPLATE = "**{kind} [#{entity.number}](<{entity.html_url}>):** {entity.title}"
+ENTITY_TEMPLATE = (
+    "**{entity.kind} [#{entity.number}](<{entity.html_url}>):** {entity.title}"
+)
 EMOJI_NAMES = frozenset(
     {
         "discussion_answered",
@@ -34,6 +42,7 @@ async def load_emojis() -> None:
     for emoji in guild.emojis:
         if emoji.name in EMOJI_NAMES:
             entity_emojis[emoji.name] = emoji
+    _format_mention.cache_clear()
     if len(entity_emojis) < len(EMOJI_NAMES):
         log_channel = cast(discord.TextChannel, bot.get_channel(config.LOG_CHANNEL_ID))
         await log_channel.send(
@@ -42,14 +51,16 @@ async def load_emojis() -> None:
         )
 
 
-def _format_mention(entity: Entity, kind: EntityKind) -> str:
-    headline = ENTITY_TEMPLATE.format(kind=kind, entity=entity)
+# Entities are immutable, so a refreshed entity that changed is a different key
+@lru_cache(maxsize=4096)
+def _format_mention(entity: Entity) -> str:
+    headline = ENTITY_TEMPLATE.format(entity=entity)
 
     # https://github.com/owner/repo/issues/12
     # -> https://github.com  owner  repo  issues  12
     #    0                   1      2     3       4
     domain, owner, name, *_ = entity.html_url.rsplit("/", 4)
-    author = entity.user.login
+    author = entity.author
     timestamp = int(entity.created_at.timestamp())
     subtext = (
         f"-# by [`{author}`](<{domain}/{author}>)"
@@ -57,33 +68,36 @@ def _format_mention(entity: Entity, kind: EntityKind) -> str:
         f" on <t:{timestamp}:D> (<t:{timestamp}:R>)\n"
     )
 
-    if isinstance(entity, Issue):
-        state = "open" if entity.state == "open" else "closed_"
-        if entity.state == "closed":
-            state += "completed" if entity.state_reason == "completed" else "unplanned"
-        emoji = entity_emojis.get(f"issue_{state}")
-    elif isinstance(entity, PullRequest):
-        state = "draft" if entity.draft else "merged" if entity.merged else entity.state
-        emoji = entity_emojis.get(f"pull_{state}")
-    else:
-        # Discussion
-        answered = getattr(entity, "answered", False)
-        emoji = entity_emojis.get("discussion_answered" if answered else "issue_draft")
+    match entity.kind:
+        case "Issue":
+            state = "open" if entity.state == "open" else "closed_"
+            if entity.state == "closed":
+                reason = entity.state_reason
+                state += "completed" if reason == "completed" else "unplanned"
+            emoji = entity_emojis.get(f"issue_{state}")
+        case "Pull Request":
+            state = (
+                "draft" if entity.draft else "merged" if entity.merged else entity.state
+            )
+            emoji = entity_emojis.get(f"pull_{state}")
+        case "Discussion":
+            emoji = entity_emojis.get(
+                "discussion_answered" if entity.answered else "issue_draft"
+            )
 
     return f"{emoji or ':question:'} {headline}\n{subtext}"
 
 
-async def entity_message(message: discord.Message) -> tuple[str, int]:
-    matches = list(
-        dict.fromkeys([r async for r in resolve_repo_signatures(message.content)])
-    )
+async def entity_message(
+    message: discord.Message, signatures: list[Signature] | None = None
+) -> tuple[str, int]:
+    if signatures is None:
+        signatures = parse_signatures(message.content)
+    matches = await resolve_signatures(signatures)
 
     entities = [
-        _format_mention(outcome[1], outcome[0])
-        for outcome in await asyncio.gather(
-            *(entity_cache.get(m) for m in matches), return_exceptions=True
-        )
-        if not isinstance(outcome, BaseException)
+        _format_mention(entity)
+        for entity in (await entity_cache.get_many(matches)).values()
     ]
 
     if len("\n".join(entities)) > 2000:
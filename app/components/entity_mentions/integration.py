@@ -1,13 +1,18 @@
 import asyncio
 import datetime as dt
+import heapq
 from contextlib import suppress
 
 import discord
+from discord.ext import tasks
 
+from app.dispatch import MessageRoute
 from app.setup import bot
 from app.utils import is_dm, is_mod, try_dm
 
 from .fmt import entity_message
+from .registry import REPLY_WINDOW, mention_replies
+from .resolution import Signature, parse_signatures
 
 IGNORED_MESSAGE_TYPES = frozenset(
     (discord.MessageType.thread_created, discord.MessageType.channel_name_change)
@@ -15,9 +20,9 @@ IGNORED_MESSAGE_TYPES = frozenset(
 
 
 class DeleteMention(discord.ui.View):
-    def __init__(self, message: discord.Message, entity_count: int) -> None:
+    def __init__(self, author_id: int, entity_count: int) -> None:
         super().__init__()
-        self.message = message
+        self.author_id = author_id
         self.plural = entity_count > 1
 
     @discord.ui.button(
@@ -29,10 +34,10 @@ class DeleteMention(discord.ui.View):
         self, interaction: discord.Interaction, _button: discord.ui.Button
     ) -> None:
         assert not is_dm(interaction.user)
-        if interaction.user.id == self.message.author.id or is_mod(interaction.user):
+        if interaction.user.id == self.author_id or is_mod(interaction.user):
             assert interaction.message
             await interaction.message.delete()
-            _unlink_original_message(interaction.message)
+            mention_replies.unlink_reply(interaction.message.id)
             return
 
         await interaction.response.send_message(
@@ -43,25 +48,43 @@ class DeleteMention(discord.ui.View):
         )
 
 
-message_to_mentions: dict[discord.Message, discord.Message] = {}
+BUTTON_TIMEOUT = dt.timedelta(seconds=30)
+# Reply ID -> when its Delete button is due for removal, and the reply itself
+expiring_buttons: dict[int, tuple[dt.datetime, discord.PartialMessage]] = {}
+button_deadlines: list[tuple[dt.datetime, int]] = []
 
 
-def _unlink_original_message(message: discord.Message) -> None:
-    original_message = next(
-        (msg for msg, reply in message_to_mentions.items() if reply == message),
-        None,
+def schedule_button_removal(message: discord.Message | discord.PartialMessage) -> None:
+    """Rescheduling a reply (e.g. after an edit) pushes its deadline back."""
+    deadline = dt.datetime.now(tz=dt.UTC) + BUTTON_TIMEOUT
+    expiring_buttons[message.id] = (
+        deadline,
+        message.channel.get_partial_message(message.id),
     )
-    if original_message is not None:
-        del message_to_mentions[original_message]
+    heapq.heappush(button_deadlines, (deadline, message.id))
 
 
-async def remove_button_after_timeout(message: discord.Message) -> None:
-    await asyncio.sleep(30)
+async def _remove_button(message: discord.PartialMessage) -> None:
     with suppress(discord.NotFound, discord.HTTPException):
         await message.edit(view=None)
 
 
-async def reply_with_entities(message: discord.Message) -> None:
+@tasks.loop(seconds=1)
+async def remove_expired_buttons() -> None:
+    now = dt.datetime.now(tz=dt.UTC)
+    due: list[discord.PartialMessage] = []
+    while button_deadlines and button_deadlines[0][0] <= now:
+        deadline, message_id = heapq.heappop(button_deadlines)
+        # Skip heap entries left behind by rescheduling
+        if (entry := expiring_buttons.get(message_id)) and entry[0] == deadline:
+            del expiring_buttons[message_id]
+            due.append(entry[1])
+    await asyncio.gather(*map(_remove_button, due))
+
+
+async def reply_with_entities(
+    message: discord.Message, signatures: list[Signature] | None = None
+) -> None:
     if message.author.bot or message.type in IGNORED_MESSAGE_TYPES:
         return
 
@@ -72,59 +95,99 @@ async def reply_with_entities(message: discord.Message) -> None:
         )
         return
 
-    msg_content, entity_count = await entity_message(message)
+    if signatures is None:
+        signatures = parse_signatures(message.content)
+    msg_content, entity_count = await entity_message(message, signatures)
     if not entity_count:
         return
 
     sent_message = await message.reply(
-        msg_content, mention_author=False, view=DeleteMention(message, entity_count)
+        msg_content,
+        mention_author=False,
+        view=DeleteMention(message.author.id, entity_count),
     )
-    message_to_mentions[message] = sent_message
-    await remove_button_after_timeout(sent_message)
+    mention_replies.register(message.id, sent_message.id, msg_content, signatures)
+    schedule_button_removal(sent_message)
+
+
+# Look for issue/PR/discussion mentions and name/link them
+MENTION_ROUTE = MessageRoute(
+    "mentions", lambda msg: parse_signatures(msg.content), reply_with_entities
+)
+
 
+async def _delete_reply(channel_id: int, message_id: int) -> None:
+    # Our own reply being deleted means it was dismissed
+    mention_replies.unlink_reply(message_id)
+    if (reply := mention_replies.pop(message_id)) is not None:
+        channel = bot.get_partial_messageable(channel_id)
+        with suppress(discord.NotFound):
+            await channel.get_partial_message(reply.reply_id).delete()
 
+
+# Raw events are used so that this works for messages that already fell out of
+# discord.py's message cache
 @bot.event
-async def on_message_delete(message: discord.Message) -> None:
-    if message.author.bot:
-        _unlink_original_message(message)
-    elif (reply := message_to_mentions.get(message)) is not None:
-        await reply.delete()
+async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent) -> None:
+    await _delete_reply(payload.channel_id, payload.message_id)
 
 
 @bot.event
-async def on_message_edit(before: discord.Message, after: discord.Message) -> None:
-    if before.content == after.content:
+async def on_raw_bulk_message_delete(
+    payload: discord.RawBulkMessageDeleteEvent,
+) -> None:
+    await asyncio.gather(
+        *(_delete_reply(payload.channel_id, id_) for id_ in payload.message_ids)
+    )
+
+
+async def _reply_to_edited(message: discord.Message) -> None:
+    if (
+        # Messages from before the registry was tracking them may already have a
+        # reply, so they're left alone
+        message.created_at < mention_replies.tracked_since
+        or message.guild is None
+        or mention_replies.was_dismissed(message.id)
+        or dt.datetime.now(tz=dt.UTC) - message.created_at > REPLY_WINDOW
+    ):
         return
-    old_entites = await entity_message(before)
-    new_entities = await entity_message(after)
-    if old_entites == new_entities:
-        # Message changed but mentions are the same
+    # Not being registered means it never got a reply, so treat this as a new
+    # message (i.e. diff it against no mentions at all)
+    if signatures := parse_signatures(message.content):
+        await reply_with_entities(message, signatures)
+
+
+@bot.event
+async def on_raw_message_edit(payload: discord.RawMessageUpdateEvent) -> None:
+    message = payload.message
+    if message.author.bot or message.edited_at is None:
+        # Not a content edit, e.g. link embeds being added
+        return
+
+    if (reply := mention_replies.get(message.id)) is None:
+        await _reply_to_edited(message)
         return
 
-    if (reply := message_to_mentions.get(before)) is None:
-        if not old_entites[1]:
-            # There were no mentions before, so treat this as a new message
-            await reply_with_entities(after)
-        # The message was removed from the M2M map at some point
+    if reply.signatures == (signatures := parse_signatures(message.content)):
+        # Message changed but mentions are the same, no need to look anything up
         return
 
-    content, count = new_entities
+    content, count = await entity_message(message, signatures)
+    reply_message = message.channel.get_partial_message(reply.reply_id)
     if not count:
         # All mentions were edited out
-        del message_to_mentions[before]
-        await reply.delete()
+        mention_replies.pop(message.id)
+        await reply_message.delete()
         return
 
-    # If the message was edited (or created, if never edited) more than 24 hours ago,
-    # stop reacting to it and remove its M2M entry.
-    last_updated = dt.datetime.now(tz=dt.UTC) - (reply.edited_at or reply.created_at)
-    if last_updated > dt.timedelta(hours=24):
-        del message_to_mentions[before]
+    mention_replies.register(message.id, reply.reply_id, content, signatures)
+    if content == reply.content:
+        # Different signatures resolved to the same entities, e.g. #123 -> main#123
         return
 
-    await reply.edit(
+    edited_reply = await reply_message.edit(
         content=content,
-        view=DeleteMention(after, count),
+        view=DeleteMention(message.author.id, count),
         allowed_mentions=discord.AllowedMentions.none(),
     )
-    await remove_button_after_timeout(reply)
+    schedule_button_removal(edited_reply)
@@ -0,0 +1,81 @@
+import datetime as dt
+from functools import partial
+
+from discord.ext import tasks
+from githubkit.exception import GitHubException
+
+from app.ratelimit import Priority, RateLimitedError, request_priority
+from app.setup import config, gh, gh_scheduler
+
+from .cache import entity_cache
+from .entities import (
+    RECENT_DISCUSSIONS_QUERY,
+    entity_from_issue,
+    graphql_request,
+    parse_entity,
+)
+
+# How far back the first run after startup looks
+INITIAL_WINDOW = dt.timedelta(days=3)
+MAX_PAGES = 10
+
+# Repo name -> time of the last successful prefetch
+last_prefetched: dict[str, dt.datetime] = {}
+
+
+async def _prefetch_issues(repo: str, since: dt.datetime) -> None:
+    """Covers pull requests too, as they're also listed as issues."""
+    for page in range(1, MAX_PAGES + 1):
+        resp = await gh_scheduler.request(
+            "core",
+            partial(
+                gh.rest.issues.async_list_for_repo,
+                config.GITHUB_ORG,
+                repo,
+                state="all",
+                sort="updated",
+                direction="desc",
+                since=since,
+                per_page=100,
+                page=page,
+            ),
+        )
+        for issue in (issues := resp.parsed_data):
+            key = (config.GITHUB_ORG, repo, issue.number)
+            entity_cache[key] = entity_from_issue(issue)
+        if len(issues) < 100:
+            return
+
+
+async def _prefetch_discussions(repo: str, since: dt.datetime) -> None:
+    cursor = None
+    for _ in range(MAX_PAGES):
+        data = await graphql_request(
+            RECENT_DISCUSSIONS_QUERY,
+            {"owner": config.GITHUB_ORG, "repo": repo, "cursor": cursor},
+        )
+        discussions = data["repository"]["discussions"]
+        for discussion in discussions["nodes"]:
+            if dt.datetime.fromisoformat(discussion.pop("updated_at")) < since:
+                return
+            key = (config.GITHUB_ORG, repo, discussion["number"])
+            entity_cache[key] = parse_entity(discussion)
+        if not discussions["pageInfo"]["hasNextPage"]:
+            return
+        cursor = discussions["pageInfo"]["endCursor"]
+
+
+@tasks.loop(minutes=10)
+async def prefetch_entities() -> None:
+    """Caches issues, PRs and discussions recently active in our own repos."""
+    request_priority.set(Priority.BACKGROUND)
+    for repo in config.GITHUB_REPOS.values():
+        started_at = dt.datetime.now(tz=dt.UTC)
+        since = last_prefetched.get(repo, started_at - INITIAL_WINDOW)
+        try:
+            await _prefetch_issues(repo, since)
+            await _prefetch_discussions(repo, since)
+        except (GitHubException, RateLimitedError):
+            # Picked up from the same point on the next run
+            continue
+        last_prefetched[repo] = started_at
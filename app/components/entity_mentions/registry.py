@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import datetime as dt
+from collections import OrderedDict
+from contextlib import suppress
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from app import persistence
+
+    from .resolution import Signature
+
+
+class MentionReply(NamedTuple):
+    reply_id: int
+    content: str
+    # Of the original message, so that edits can be diffed without fetching it
+    signatures: list[Signature]
+    updated_at: dt.datetime
+
+
+class ReplyRegistry:
+    """
+    Maps IDs of messages mentioning entities to the bot's replies, with a reverse
+    index for when a reply is deleted. Entries expire once their reply hasn't been
+    updated for the TTL, and the oldest ones are dropped when over the size cap.
+    Messages sent since `tracked_since` that aren't registered never got a reply.
+    """
+
+    def __init__(self, ttl: dt.timedelta, max_size: int) -> None:
+        self._ttl = ttl
+        self._max_size = max_size
+        # Ordered by last update, since updated entries are moved to the end
+        self._replies: OrderedDict[int, MentionReply] = OrderedDict()
+        self._originals: dict[int, int] = {}
+        # Originals whose reply was deleted, which mustn't get a new one on edit
+        self._dismissed: OrderedDict[int, dt.datetime] = OrderedDict()
+        # Moved back to when the registry was first started by restoring it, and
+        # forward when entries are dropped
+        self.tracked_since = dt.datetime.now(tz=dt.UTC)
+
+    def __len__(self) -> int:
+        return len(self._replies)
+
+    def register(
+        self,
+        original_id: int,
+        reply_id: int,
+        content: str,
+        signatures: list[Signature],
+    ) -> None:
+        self.pop(original_id)
+        now = dt.datetime.now(tz=dt.UTC)
+        self._replies[original_id] = MentionReply(reply_id, content, signatures, now)
+        self._originals[reply_id] = original_id
+        self._evict()
+
+    def get(self, original_id: int) -> MentionReply | None:
+        self._evict()
+        return self._replies.get(original_id)
+
+    def pop(self, original_id: int) -> MentionReply | None:
+        if (reply := self._replies.pop(original_id, None)) is not None:
+            del self._originals[reply.reply_id]
+        return reply
+
+    def unlink_reply(self, reply_id: int) -> None:
+        if (original_id := self._originals.get(reply_id)) is not None:
+            self.pop(original_id)
+            self._dismissed[original_id] = dt.datetime.now(tz=dt.UTC)
+            self._evict()
+
+    def was_dismissed(self, original_id: int) -> bool:
+        self._evict()
+        return original_id in self._dismissed
+
+    def snapshot(self) -> list[persistence.Entry]:
+        entries: list[persistence.Entry] = [
+            (["tracked_since"], self.tracked_since.timestamp(), None)
+        ]
+        for original_id, reply in self._replies.items():
+            value = [reply.reply_id, reply.content, reply.signatures]
+            entries.append(
+                (["reply", original_id], reply.updated_at.timestamp(), value)
+            )
+        entries.extend(
+            (["dismissed", original_id], dismissed_at.timestamp(), None)
+            for original_id, dismissed_at in self._dismissed.items()
+        )
+        return entries
+
+    def restore(self, entries: Iterable[persistence.Entry]) -> None:
+        """Skips entries that can't be decoded, expired ones are evicted as usual."""
+        replies: dict[int, MentionReply] = {}
+        dismissed: dict[int, dt.datetime] = {}
+        for key, ts, value in entries:
+            timestamp = dt.datetime.fromtimestamp(ts, tz=dt.UTC)
+            match key, value:
+                case [["tracked_since"], None]:
+                    self.tracked_since = min(self.tracked_since, timestamp)
+                case [
+                    ["reply", int(original_id)],
+                    [
+                        int(reply_id),
+                        str(content),
+                        list(signatures),
+                    ],
+                ]:
+                    # Signatures are stored as JSON arrays
+                    with suppress(TypeError, ValueError):
+                        replies[original_id] = MentionReply(
+                            reply_id,
+                            content,
+                            [
+                                (owner, repo, number)
+                                for owner, repo, number in signatures
+                            ],
+                            timestamp,
+                        )
+                case [["dismissed", int(original_id)], None]:
+                    dismissed[original_id] = timestamp
+        # Anything registered since starting is newer than the restored entries
+        self._replies = OrderedDict(
+            sorted(
+                (replies | self._replies).items(), key=lambda item: item[1].updated_at
+            )
+        )
+        self._originals = {
+            reply.reply_id: original_id for original_id, reply in self._replies.items()
+        }
+        self._dismissed = OrderedDict(
+            sorted((dismissed | self._dismissed).items(), key=lambda item: item[1])
+        )
+        self._evict()
+
+    def _evict(self) -> None:
+        # Dropped entries make messages up to their last update untracked, which
+        # only matters for ones dropped over the size cap before expiring
+        cutoff = dt.datetime.now(tz=dt.UTC) - self._ttl
+        while self._replies and (
+            len(self._replies) > self._max_size
+            or next(iter(self._replies.values())).updated_at < cutoff
+        ):
+            _, reply = self._replies.popitem(last=False)
+            del self._originals[reply.reply_id]
+            self.tracked_since = max(self.tracked_since, reply.updated_at)
+        while self._dismissed and (
+            len(self._dismissed) > self._max_size
+            or next(iter(self._dismissed.values())) < cutoff
+        ):
+            _, dismissed_at = self._dismissed.popitem(last=False)
+            self.tracked_since = max(self.tracked_since, dismissed_at)
+
+
+# Replies stop following their original message after a day without updates
+REPLY_WINDOW = dt.timedelta(hours=24)
+mention_replies = ReplyRegistry(ttl=REPLY_WINDOW, max_size=10_000)
@@ -1,11 +1,10 @@
 import re
-from collections.abc import AsyncIterator
-from contextlib import suppress
+from collections.abc import Iterator
 
-from githubkit.exception import RequestFailed
+from app.components.entity_mentions.cache import owner_cache
+from app.setup import config
 
-from app.components.entity_mentions.cache import TTRCache
-from app.setup import config, gh
+from .entities import CacheKey
 
 ENTITY_REGEX = re.compile(
     r"(?P<owner>\b[a-z0-9\-]+/)?"
@@ -13,30 +12,28 @@ ENTITY_REGEX = re.compile(
     r"#(?P<number>\d{1,6})(?!\.\d)\b",
     re.IGNORECASE,
 )
+# Code blocks, inline code and URLs, whose #123-like parts aren't mentions
+IGNORED_SPANS_REGEX = re.compile(
+    r"```.+?```|``.+?``|`[^`]+`|https?://\S+", re.DOTALL | re.IGNORECASE
+)
 
+# An owner of None means it still has to be looked up from the repo name
+type Signature = tuple[str | None, str, int]
 
-class OwnerCache(TTRCache[str, str]):
-    async def fetch(self, key: str) -> None:
-        self[key] = await find_repo_owner(key)
-
-
-owner_cache = OwnerCache(3600)  # 1 hour
 
+def _find_mentions(content: str) -> Iterator[re.Match[str]]:
+    # Scanning between the ignored spans in place avoids copying the content
+    pos = 0
+    for span in IGNORED_SPANS_REGEX.finditer(content):
+        yield from ENTITY_REGEX.finditer(content, pos, span.start())
+        pos = span.end()
+    yield from ENTITY_REGEX.finditer(content, pos)
 
-async def find_repo_owner(name: str) -> str:
-    resp = await gh.rest.search.async_repos(
-        q=name, sort="stars", order="desc", per_page=20
-    )
-    return next(
-        r.owner.login
-        for r in resp.parsed_data.items
-        if r.name == name and r.owner is not None
-    )
 
-
-async def resolve_repo_signatures(content: str) -> AsyncIterator[tuple[str, str, int]]:
-    valid_signatures = 0
-    for match in ENTITY_REGEX.finditer(content):
+def parse_signatures(content: str) -> list[Signature]:
+    """Parses the first 10 valid signatures without any network calls."""
+    signatures: list[Signature] = []
+    for match in _find_mentions(content):
         owner, repo, number = match["owner"], match["repo"], int(match["number"])
         match owner, repo:
             case None, None if number < 10:
@@ -44,20 +41,38 @@ async def resolve_repo_signatures(content: str) -> AsyncIterator[tuple[str, str,
                 continue
             case None, None:
                 # Standard Ghostty mention, e.g. #2354
-                yield config.GITHUB_ORG, config.GITHUB_REPOS["main"], number
+                signatures.append(
+                    (config.GITHUB_ORG, config.GITHUB_REPOS["main"], number)
+                )
             case None, "main" | "web" | "bot" as repo:
                 # Special ghostty-org prefixes
-                yield config.GITHUB_ORG, config.GITHUB_REPOS[repo], number
+                signatures.append(
+                    (config.GITHUB_ORG, config.GITHUB_REPOS[repo], number)
+                )
             case None, repo:
                 # Only a name provided, e.g. uv#8020.
-                with suppress(RequestFailed, RuntimeError):
-                    yield await owner_cache.get(repo), repo, number
+                signatures.append((None, repo, number))
             case owner, None:
                 # Invalid case, e.g. trag1c/#123
                 continue
             case owner, repo:
                 # Any public repo, e.g. trag1c/ixia#33.
-                yield owner.rstrip("/"), repo, number
-        valid_signatures += 1
-        if valid_signatures == 10:
+                signatures.append((owner.rstrip("/"), repo, number))
+        if len(signatures) == 10:
             break
+    return signatures
+
+
+async def resolve_signatures(signatures: list[Signature]) -> list[CacheKey]:
+    """
+    Resolves signatures in order, looking up all missing owners concurrently.
+    Signatures whose owner couldn't be found are dropped.
+    """
+    owners = await owner_cache.get_many(
+        repo for owner, repo, _ in signatures if owner is None
+    )
+    keys: list[CacheKey] = []
+    for owner, repo, number in signatures:
+        if (resolved := owner or owners.get(repo)) is not None:
+            keys.append((resolved, repo, number))
+    return keys
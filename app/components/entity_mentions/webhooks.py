@@ -0,0 +1,73 @@
+import hashlib
+import hmac
+import json
+from typing import Any
+
+from aiohttp import web
+
+from app.setup import config
+
+from .cache import entity_cache
+from .entities import CacheKey, EntityKind, entity_from_webhook
+
+# Event name -> entity kind and payload field
+WEBHOOK_EVENTS: dict[str, tuple[EntityKind, str]] = {
+    "discussion": ("Discussion", "discussion"),
+    "issues": ("Issue", "issue"),
+    "pull_request": ("Pull Request", "pull_request"),
+}
+
+
+def _verify_signature(body: bytes, signature: str) -> bool:
+    assert config.GITHUB_WEBHOOK_SECRET is not None
+    digest = hmac.new(
+        config.GITHUB_WEBHOOK_SECRET.encode(), body, hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(f"sha256={digest}", signature)
+
+
+def update_entity_cache(event: str, payload: dict[str, Any]) -> None:
+    if event not in WEBHOOK_EVENTS:
+        return
+    kind, field = WEBHOOK_EVENTS[event]
+    data, repo = payload[field], payload["repository"]
+    key: CacheKey = (repo["owner"]["login"], repo["name"], data["number"])
+    match payload["action"]:
+        case "deleted":
+            entity_cache.mark_missing(key)
+        case "transferred":
+            if key in entity_cache:
+                del entity_cache[key]
+        case _:
+            entity_cache[key] = entity_from_webhook(kind, data)
+
+
+async def handle_webhook(request: web.Request) -> web.Response:
+    body = await request.read()
+    if not _verify_signature(body, request.headers.get("X-Hub-Signature-256", "")):
+        return web.Response(status=401)
+    update_entity_cache(request.headers.get("X-GitHub-Event", ""), json.loads(body))
+    return web.Response(status=204)
+
+
+async def start_webhook_server() -> None:
+    """
+    Starts receiving GitHub webhooks to keep cached entities up to date,
+    if a webhook secret is configured.
+    """
+    if config.GITHUB_WEBHOOK_SECRET is None or _runner.server is not None:
+        return
+    await _runner.setup()
+    try:
+        await web.TCPSite(_runner, port=config.WEBHOOK_PORT).start()
+    except OSError as exc:
+        # E.g. the port being taken. Cached entities then keep being polled.
+        print("Failed to start the webhook server:", exc)
+        await _runner.cleanup()
+        return
+    entity_cache.receives_webhooks = True
+
+
+webhook_app = web.Application()
+webhook_app.router.add_post("/github", handle_webhook)
+_runner = web.AppRunner(webhook_app)
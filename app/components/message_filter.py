@@ -4,6 +4,7 @@ from typing import NamedTuple
 
 import discord
 
+from app.dispatch import MessageRoute
 from app.setup import config
 from app.utils import format_or_file, try_dm
 
@@ -46,31 +47,48 @@ MESSAGE_FILTERS = (
 )
 
 
-async def check_message_filters(message: discord.Message) -> bool:
-    for msg_filter in MESSAGE_FILTERS:
-        if message.channel.id != msg_filter.channel_id or msg_filter.filter(message):
-            continue
+FILTERS_BY_CHANNEL = {
+    msg_filter.channel_id: msg_filter for msg_filter in MESSAGE_FILTERS
+}
 
-        await message.delete()
 
-        # Don't DM the user if it's a system message
-        # (e.g. "@user started a thread")
-        if message.type not in REGULAR_MESSAGE_TYPES:
-            continue
+def match_message_filter(message: discord.Message) -> MessageFilter | None:
+    """Finds a filter the message violates, without taking any action yet."""
+    msg_filter = FILTERS_BY_CHANNEL.get(message.channel.id)
+    if msg_filter is None or msg_filter.filter(message):
+        return None
+    return msg_filter
 
-        assert isinstance(message.channel, discord.TextChannel)
 
-        notification = MESSAGE_DELETION_TEMPLATE.format(
-            message.channel.mention, *msg_filter.template_fillers
-        )
-        if content_size := len(message.content):
-            notification += MESSAGE_CONTENT_NOTICE
-        await try_dm(message.author, notification, silent=content_size > 0)
+async def apply_message_filter(
+    message: discord.Message, msg_filter: MessageFilter
+) -> None:
+    await message.delete()
 
-        if content_size > 0:
-            content, file = format_or_file(message.content)
-            await try_dm(message.author, content, file=file)
-            await try_dm(message.author, COPY_TEXT_HINT, silent=True)
+    # Don't DM the user if it's a system message
+    # (e.g. "@user started a thread")
+    if message.type not in REGULAR_MESSAGE_TYPES:
+        return
 
-        return True
-    return False
+    assert isinstance(message.channel, discord.TextChannel)
+
+    notification = MESSAGE_DELETION_TEMPLATE.format(
+        message.channel.mention, *msg_filter.template_fillers
+    )
+    if content_size := len(message.content):
+        notification += MESSAGE_CONTENT_NOTICE
+    await try_dm(message.author, notification, silent=content_size > 0)
+
+    if content_size > 0:
+        content, file = format_or_file(message.content)
+        await try_dm(message.author, content, file=file)
+        await try_dm(message.author, COPY_TEXT_HINT, silent=True)
+
+
+# Delete invalid messages in #showcase and #media
+FILTER_ROUTE = MessageRoute(
+    "filters",
+    match_message_filter,
+    apply_message_filter,
+    channel_ids=frozenset(FILTERS_BY_CHANNEL),
+)
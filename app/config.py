@@ -9,9 +9,13 @@ BOT_TOKEN = os.environ["BOT_TOKEN"]
 GITHUB_ORG = os.environ["GITHUB_ORG"]
 GITHUB_REPOS = dict(val.split(":") for val in os.environ["GITHUB_REPOS"].split(","))
 GITHUB_TOKEN = os.environ["GITHUB_TOKEN"]
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+WEBHOOK_PORT = int(os.getenv("BOT_WEBHOOK_PORT", "8080"))
 
 ACCEPT_INVITE_URL = os.environ["BOT_ACCEPT_INVITE_URL"]
 SENTRY_DSN = os.getenv("SENTRY_DSN")
+CACHE_PATH = os.getenv("BOT_CACHE_PATH")
+ENTITY_BATCH_WINDOW = int(os.getenv("BOT_ENTITY_BATCH_WINDOW_MS", "30")) / 1000
 
 HELP_CHANNEL_TAG_IDS = {
     name: int(id_)
@@ -3,25 +3,38 @@ from traceback import print_tb
 from typing import cast
 
 import discord
-from discord.ext import commands
+from discord.ext import tasks
 from sentry_sdk import capture_exception
 
 from app.components.autoclose import autoclose_solved_posts
-from app.components.docs import refresh_sitemap
+from app.components.docs import poll_sitemap, refresh_sitemap
 from app.components.entity_mentions import (
-    ENTITY_REGEX,
+    MENTION_ROUTE,
+    load_caches,
     load_emojis,
-    reply_with_entities,
+    prefetch_entities,
+    remove_expired_buttons,
+    start_webhook_server,
+    sweep_caches,
 )
-from app.components.message_filter import check_message_filters
+from app.components.message_filter import FILTER_ROUTE
+from app.dispatch import MessageDispatcher, MessageRoute
 from app.setup import bot, config
+from app.supervisor import Lane, TaskSupervisor
 from app.utils import is_dm, is_mod, try_dm
 
 
 @bot.event
 async def on_ready() -> None:
+    await load_caches()
     await load_emojis()
     autoclose_solved_posts.start()
+    poll_sitemap.start()
+    sweep_caches.start()
+    prefetch_entities.start()
+    remove_expired_buttons.start()
+    report_shed_work.start()
+    await start_webhook_server()
     print(f"Bot logged on as {bot.user}!")
 
 
@@ -44,34 +57,16 @@ async def on_app_command_error(
 @bot.event
 async def on_message(message: discord.Message) -> None:
     # Ignore our own messages
-    if message.author == bot.user:
-        return
-
-    # Mod-only sync command
-    if message.content.rstrip() == "!sync":
-        await sync(bot, message)
-        return
-
-    # Simple test
-    if message.guild is None and message.content == "ping":
-        await try_dm(message.author, "pong")
-        return
-
-    # Delete invalid messages in #showcase and #media
-    if await check_message_filters(message):
-        return
+    if message.author != bot.user:
+        dispatcher.dispatch(message)
 
-    # Look for issue/PR/discussion mentions and name/link them
-    if ENTITY_REGEX.search(message.content):
-        await reply_with_entities(message)
 
-
-async def sync(bot: commands.Bot, message: discord.Message) -> None:
+async def sync(message: discord.Message, _: object) -> None:
     """Syncs all global commands."""
     if is_dm(message.author) or not is_mod(message.author):
         return
 
-    refresh_sitemap()
+    await refresh_sitemap()
     await bot.tree.sync()
     await try_dm(message.author, "Command tree synced.")
 
@@ -85,3 +80,44 @@ def handle_error(error: BaseException) -> None:
     print_tb(error.__traceback__)
     if isinstance(error, discord.app_commands.CommandInvokeError):
         handle_error(error.original)
+
+
+@tasks.loop(minutes=15)
+async def report_shed_work() -> None:
+    # Batched, so that a flood of messages doesn't also flood the log channel
+    if not (shed := supervisor.take_shed()):
+        return
+    log_channel = cast(discord.TextChannel, bot.get_channel(config.LOG_CHANNEL_ID))
+    await log_channel.send(
+        "Dropped work under load: "
+        + ", ".join(f"{count:,} {category}" for category, count in shed.items())
+    )
+
+
+# Handler work runs in the background, so that floods of messages queue up (and
+# eventually get dropped) instead of piling up unbounded concurrent requests.
+# Filters and moderation are never dropped, as they enforce the server's rules.
+supervisor = TaskSupervisor(
+    {
+        "mentions": Lane(concurrency=8, max_queued=200),
+        "filters": Lane(concurrency=4, max_queued=0),
+        "dms": Lane(concurrency=2, max_queued=50),
+        "moderation": Lane(concurrency=1, max_queued=0),
+    },
+    on_error=handle_error,
+)
+dispatcher = MessageDispatcher(
+    supervisor,
+    (
+        # Mod-only sync command
+        MessageRoute("moderation", lambda msg: msg.content.rstrip() == "!sync", sync),
+        # Simple test
+        MessageRoute(
+            "dms",
+            lambda msg: msg.guild is None and msg.content == "ping",
+            lambda msg, _: try_dm(msg.author, "pong"),
+        ),
+        FILTER_ROUTE,
+        MENTION_ROUTE,
+    ),
+)
@@ -0,0 +1,48 @@
+from collections.abc import Awaitable, Callable, Iterable
+from functools import partial
+from typing import Any, NamedTuple
+
+import discord
+
+from app.supervisor import TaskSupervisor
+
+
+class MessageRoute(NamedTuple):
+    # The supervisor category the handler runs in
+    category: str
+    # Cheap synchronous check; a truthy result is handed to the handler
+    prefilter: Callable[[discord.Message], Any]
+    handler: Callable[[discord.Message, Any], Awaitable[object]]
+    # Channels the route is limited to, or None for all of them
+    channel_ids: frozenset[int] | None = None
+
+
+class MessageDispatcher:
+    """
+    Hands each message to the first route whose prefilter matches it. Routes are
+    indexed by channel, so only the ones applying to a channel are checked.
+    """
+
+    def __init__(
+        self, supervisor: TaskSupervisor, routes: Iterable[MessageRoute]
+    ) -> None:
+        self._supervisor = supervisor
+        routes = tuple(routes)
+        self._global_routes = tuple(r for r in routes if r.channel_ids is None)
+        # Channel routes are merged with global ones, keeping registration order
+        self._channel_routes: dict[int, tuple[MessageRoute, ...]] = {}
+        for channel_id in {id_ for r in routes for id_ in r.channel_ids or ()}:
+            self._channel_routes[channel_id] = tuple(
+                r
+                for r in routes
+                if r.channel_ids is None or channel_id in r.channel_ids
+            )
+
+    def dispatch(self, message: discord.Message) -> None:
+        routes = self._channel_routes.get(message.channel.id, self._global_routes)
+        for route in routes:
+            if result := route.prefilter(message):
+                self._supervisor.submit(
+                    route.category, partial(route.handler, message, result)
+                )
+                return
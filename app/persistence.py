@@ -0,0 +1,73 @@
+import json
+import sqlite3
+from collections.abc import Iterable
+from contextlib import closing, suppress
+from typing import Any, Protocol
+
+from app.setup import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+# A JSON-serializable key and value, and a POSIX timestamp
+type Entry = tuple[Any, float, Any]
+
+
+class Persistent(Protocol):
+    def snapshot(self) -> list[Entry]: ...
+
+    def restore(self, entries: Iterable[Entry]) -> None: ...
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    return conn
+
+
+def load(namespace: str) -> list[Entry]:
+    """
+    Persistence is optional, so a database that can't be read is treated as
+    empty, and so are entries that can't be decoded.
+    """
+    if config.CACHE_PATH is None:
+        return []
+    entries: list[Entry] = []
+    try:
+        with closing(_connect(config.CACHE_PATH)) as conn:
+            rows = conn.execute(
+                "SELECT key, timestamp, value FROM entries WHERE namespace = ?",
+                (namespace,),
+            ).fetchall()
+    except sqlite3.Error as exc:
+        print(f"Failed to load {namespace!r} from {config.CACHE_PATH}:", exc)
+        return []
+    for key, ts, value in rows:
+        with suppress(ValueError):
+            entries.append((json.loads(key), ts, json.loads(value)))
+    return entries
+
+
+def save(namespace: str, entries: Iterable[Entry]) -> None:
+    """Replaces all entries stored under the namespace."""
+    if config.CACHE_PATH is None:
+        return
+    try:
+        with closing(_connect(config.CACHE_PATH)) as conn, conn:
+            conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+            conn.executemany(
+                "INSERT INTO entries VALUES (?, ?, ?, ?)",
+                (
+                    (namespace, json.dumps(key), ts, json.dumps(value))
+                    for key, ts, value in entries
+                ),
+            )
+    except sqlite3.Error as exc:
+        print(f"Failed to save {namespace!r} to {config.CACHE_PATH}:", exc)
@@ -0,0 +1,155 @@
+import asyncio
+import datetime as dt
+import heapq
+import itertools
+import math
+from collections.abc import Awaitable, Callable, Mapping
+from contextlib import suppress
+from contextvars import ContextVar
+from enum import IntEnum
+
+from githubkit import Response
+from githubkit.exception import RequestFailed
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # Someone is waiting for the result, e.g. a mention reply
+    BACKGROUND = 1  # Cache refreshes, prefetching, etc.
+
+
+# Set this in tasks doing background work; requests default to being interactive
+request_priority = ContextVar("request_priority", default=Priority.INTERACTIVE)
+
+
+class RateLimitedError(Exception):
+    def __init__(self, resource: str, reset: dt.datetime | None) -> None:
+        super().__init__(f"GitHub's {resource} rate limit is exhausted until {reset}")
+        self.resource = resource
+        self.reset = reset
+
+
+class Bucket:
+    # Share of the quota that background requests leave for interactive ones
+    BACKGROUND_RESERVE = 0.2
+    # Interactive requests wait for the quota to reset only if it's this soon
+    MAX_WAIT = dt.timedelta(minutes=1)
+
+    def __init__(self, resource: str) -> None:
+        self.resource = resource
+        # Unknown until the first response comes in
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.reset: dt.datetime | None = None
+        self.in_flight = 0
+        self._waiters: list[tuple[Priority, int, asyncio.Future[None]]] = []
+        self._counter = itertools.count()
+        self._wakeup: asyncio.TimerHandle | None = None
+
+    def _available(self) -> float:
+        if self.reset is not None and self.reset <= dt.datetime.now(tz=dt.UTC):
+            # Assume the quota was replenished until told otherwise
+            self.remaining, self.reset = self.limit, None
+        if self.remaining is None:
+            return math.inf
+        return self.remaining - self.in_flight
+
+    def _admits(self, priority: Priority) -> bool:
+        available = self._available()
+        if priority is Priority.BACKGROUND and self.limit is not None:
+            return available > self.limit * self.BACKGROUND_RESERVE
+        return available > 0
+
+    async def acquire(self, priority: Priority) -> None:
+        if not self._waiters and self._admits(priority):
+            self.in_flight += 1
+            return
+        if priority is Priority.BACKGROUND:
+            # Shed low-value work instead of queueing it behind interactive requests
+            raise RateLimitedError(self.resource, self.reset)
+        if self.reset is not None and (
+            self.reset - dt.datetime.now(tz=dt.UTC) > self.MAX_WAIT
+        ):
+            raise RateLimitedError(self.resource, self.reset)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self._schedule_wakeup()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Cancelled right after being granted a slot
+                self.release()
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        with suppress(KeyError, ValueError):
+            self.limit = int(headers["X-RateLimit-Limit"])
+            self.remaining = int(headers["X-RateLimit-Remaining"])
+            self.reset = dt.datetime.fromtimestamp(
+                int(headers["X-RateLimit-Reset"]), tz=dt.UTC
+            )
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._admits(priority):
+                break
+            heapq.heappop(self._waiters)
+            self.in_flight += 1
+            future.set_result(None)
+        self._schedule_wakeup()
+
+    def _schedule_wakeup(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        if self._waiters and self.reset is not None:
+            delay = (self.reset - dt.datetime.now(tz=dt.UTC)).total_seconds()
+            self._wakeup = asyncio.get_running_loop().call_later(
+                max(delay, 0), self._wake
+            )
+
+
+class GitHubScheduler:
+    """
+    Routes GitHub requests through per-resource quota buckets (core, search,
+    graphql), tracked from the X-RateLimit-* headers of every response.
+    Interactive requests are queued ahead of background ones and background
+    requests are shed once a bucket runs low.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: dict[str, Bucket] = {}
+
+    def bucket(self, resource: str) -> Bucket:
+        if resource not in self._buckets:
+            self._buckets[resource] = Bucket(resource)
+        return self._buckets[resource]
+
+    def update(self, resource: str, headers: Mapping[str, str]) -> None:
+        self.bucket(headers.get("X-RateLimit-Resource", resource)).update(headers)
+
+    async def request[RT: Response](
+        self, resource: str, call: Callable[[], Awaitable[RT]]
+    ) -> RT:
+        bucket = self.bucket(resource)
+        await bucket.acquire(request_priority.get())
+        try:
+            resp = await call()
+        except RequestFailed as exc:
+            self.update(resource, exc.response.headers)
+            raise
+        else:
+            self.update(resource, resp.headers)
+        finally:
+            bucket.release()
+        return resp
@@ -3,6 +3,7 @@ from discord.ext import commands
 from githubkit import GitHub
 
 from app import config
+from app.ratelimit import GitHubScheduler
 
 intents = discord.Intents.default()
 intents.members = True
@@ -13,4 +14,7 @@ bot = commands.Bot(
     allowed_mentions=discord.AllowedMentions(everyone=False, roles=False),
 )
 
-gh = GitHub(config.GITHUB_TOKEN)
+# Conditional requests are made by the caches themselves, which need to see the
+# 304 responses that githubkit's HTTP cache would turn into cached 200s
+gh = GitHub(config.GITHUB_TOKEN, http_cache=False)
+gh_scheduler = GitHubScheduler()
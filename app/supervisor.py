@@ -0,0 +1,65 @@
+import asyncio
+from collections import Counter
+from collections.abc import Awaitable, Callable, Mapping
+from typing import NamedTuple
+
+type Work = Callable[[], Awaitable[object]]
+
+
+class Lane(NamedTuple):
+    concurrency: int
+    # 0 for an unbounded queue, for work that mustn't be dropped
+    max_queued: int
+
+
+class TaskSupervisor:
+    """
+    Runs work submitted by event handlers in the background, with a concurrency
+    limit and a queue per category. Work submitted to a full queue is dropped
+    and counted, and errors are passed to the error handler instead of
+    propagating.
+    """
+
+    def __init__(
+        self,
+        lanes: Mapping[str, Lane],
+        on_error: Callable[[BaseException], None],
+    ) -> None:
+        self._lanes = lanes
+        self._on_error = on_error
+        self._queues: dict[str, asyncio.Queue[Work]] = {}
+        self._workers: set[asyncio.Task[None]] = set()
+        self.shed = Counter[str]()
+
+    def submit(self, category: str, work: Work) -> bool:
+        """Returns whether the work was accepted."""
+        try:
+            self._queue(category).put_nowait(work)
+        except asyncio.QueueFull:
+            self.shed[category] += 1
+            return False
+        return True
+
+    def take_shed(self) -> Counter[str]:
+        """Returns the work dropped per category since the last call."""
+        shed, self.shed = self.shed, Counter[str]()
+        return shed
+
+    def _queue(self, category: str) -> asyncio.Queue[Work]:
+        # Created lazily, since workers need a running event loop
+        if category not in self._queues:
+            lane = self._lanes[category]
+            queue = self._queues[category] = asyncio.Queue(lane.max_queued)
+            for _ in range(lane.concurrency):
+                worker = asyncio.create_task(self._work(queue))
+                self._workers.add(worker)
+                worker.add_done_callback(self._workers.discard)
+        return self._queues[category]
+
+    async def _work(self, queue: asyncio.Queue[Work]) -> None:
+        while True:
+            task = asyncio.ensure_future((await queue.get())())
+            await asyncio.wait({task})
+            queue.task_done()
+            if not task.cancelled() and (exc := task.exception()) is not None:
+                self._on_error(exc)